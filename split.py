@@ -1,12 +1,29 @@
 from __future__ import annotations
 
+import io
+import os
+import pickle
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Iterable, Iterator, List, Dict, Any, Optional
 
 import yaml
 
+try:  # libyaml C bindings; several times faster than the pure-Python classes
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# FAST_YAML=1 emits skeletons as JSON (a YAML subset) via orjson,
+# which is several times faster than even the libyaml dumper.
+FAST_YAML = os.environ.get("FAST_YAML") == "1"
+
 # ===========================
 # Configuration
 # ===========================
@@ -14,6 +31,7 @@ INPUT_PATH = Path("input/raw_chat.txt")
 CHUNKS_DIR = Path("chunks")
 OUT_CHAPTERS_DIR = Path("output/chapters")
 SCHEMA_PATH = Path("schema.yaml")
+SCHEMA_CACHE_PATH = Path(".schema.pkl")
 
 TURNS_PER_CHUNK = 10
 OVERLAP_TURNS = 0  # set >0 if you want overlap context between chunks
@@ -22,8 +40,20 @@ MSG_START_RE = re.compile(
     r"^\[(20\d{2}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})\]\s*(.+?):\s*(.*)$"
 )
 
+# Whole-text variant: one header plus everything up to the next header.
+# Lets a single C-level finditer sweep replace the per-line state machine.
+# The lookahead must demand the full header shape (timestamp AND a
+# "speaker:" colon on the same line), exactly like MSG_START_RE;
+# otherwise a content line that merely starts with a timestamp would
+# terminate the match and be silently dropped.
+TURN_RE = re.compile(
+    r"^\[(20\d{2}-\d{2}-\d{2}[ \t]+\d{2}:\d{2}:\d{2})\][ \t]*([^\n]+?):[ \t]*"
+    r"(.*?)(?=^\[20\d{2}-\d{2}-\d{2}[ \t]+\d{2}:\d{2}:\d{2}\][ \t]*[^\n]+:|\Z)",
+    re.M | re.S,
+)
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Turn:
     idx: int
     timestamp: str  # "YYYY-MM-DD HH:MM:SS"
@@ -31,31 +61,42 @@ class Turn:
     content: str
 
 
-def parse_turns(text: str) -> List[Turn]:
-    lines = text.splitlines()
-    turns: List[Turn] = []
+def _finalize_content(lines: List[str]) -> str:
+    # Single-line turns are the common case; skip the join for them.
+    return lines[0].strip() if len(lines) == 1 else "\n".join(lines).strip()
+
+
+def parse_turns_stream(lines: Iterable[str]) -> Iterator[Turn]:
+    """Parse turns from an iterable of lines (e.g. an open file handle).
+
+    Streams the input instead of materializing the whole text, so peak
+    memory stays at one Turn's worth of content plus the Turn objects
+    the caller keeps.
+    """
+    _match = MSG_START_RE.match  # bound once; avoids per-line attribute lookup
     current = None
     idx = 0
 
     for line in lines:
-        m = MSG_START_RE.match(line)
+        line = line.rstrip("\r\n")
+        # Cheap prefix test rejects continuation lines without entering
+        # the regex engine; the regex stays authoritative for real headers.
+        m = _match(line) if line[:2] == "[2" else None
         if m:
             if current is not None:
                 idx += 1
-                turns.append(
-                    Turn(
-                        idx=idx,
-                        timestamp=current["timestamp"],
-                        speaker=current["speaker"],
-                        content="\n".join(current["content_lines"]).strip(),
-                    )
+                yield Turn(
+                    idx=idx,
+                    timestamp=current["timestamp"],
+                    speaker=current["speaker"],
+                    content=_finalize_content(current["content_lines"]),
                 )
 
             timestamp, speaker, first_tail = m.group(1), m.group(2), m.group(3)
             current = {
                 "timestamp": timestamp,
                 "speaker": speaker.strip(),
-                "content_lines": [first_tail] if first_tail else [],
+                "content_lines": [first_tail],
             }
         else:
             if current is None:
@@ -64,16 +105,25 @@ def parse_turns(text: str) -> List[Turn]:
 
     if current is not None:
         idx += 1
-        turns.append(
-            Turn(
-                idx=idx,
-                timestamp=current["timestamp"],
-                speaker=current["speaker"],
-                content="\n".join(current["content_lines"]).strip(),
-            )
+        yield Turn(
+            idx=idx,
+            timestamp=current["timestamp"],
+            speaker=current["speaker"],
+            content=_finalize_content(current["content_lines"]),
         )
 
-    return turns
+
+def parse_turns_text(text: str) -> List[Turn]:
+    """Parse the whole transcript with one TURN_RE sweep.
+
+    Moves the hot loop from Python bytecode into the regex engine;
+    callers should fall back to parse_turns_stream if this yields
+    nothing (e.g. an unexpected header format).
+    """
+    return [
+        Turn(idx=i, timestamp=ts, speaker=spk.strip(), content=body.strip())
+        for i, (ts, spk, body) in enumerate(TURN_RE.findall(text), start=1)
+    ]
 
 
 def chunk_indices(total_turns: int, chunk_size: int, overlap: int) -> List[Dict[str, int]]:
@@ -82,45 +132,58 @@ def chunk_indices(total_turns: int, chunk_size: int, overlap: int) -> List[Dict[
     if overlap < 0 or overlap >= chunk_size:
         raise ValueError("overlap must be >=0 and < chunk_size")
 
-    ranges = []
-    start = 0
-    ch_id = 1
-    while start < total_turns:
-        end = min(start + chunk_size, total_turns)
-        ranges.append({"ch_id": ch_id, "start_i": start, "end_i": end})
-        ch_id += 1
-        if end == total_turns:
-            break
-        # advance start while keeping the requested overlap (if any)
-        start = max(end - overlap, 0)
-    return ranges
+    # Starts advance by chunk_size - overlap; the filter drops any start
+    # past the chunk that already reached total_turns (matching the old
+    # loop's early break when overlap > 0).
+    step = chunk_size - overlap
+    return [
+        {"ch_id": i + 1, "start_i": s, "end_i": min(s + chunk_size, total_turns)}
+        for i, s in enumerate(range(0, total_turns, step))
+        if s == 0 or s - step + chunk_size < total_turns
+    ]
 
 
 def write_chunk_file(turns: List[Turn], ch_id: int, out_dir: Path) -> Path:
     out_dir.mkdir(parents=True, exist_ok=True)
     filename = out_dir / f"ch_{ch_id:04d}.txt"
 
-    header = [
-        f"# chunk_id: ch_{ch_id:04d}",
-        f"# turns_range: {turns[0].idx}..{turns[-1].idx}",
-        f"# turns_count: {len(turns)}",
-        "",
-    ]
-
-    body = []
-    for t in turns:
-        body.append(f"[{t.timestamp}] {t.speaker}:")
-        body.append(t.content if t.content else "(empty)")
-        body.append("")
-
-    filename.write_text("\n".join(header + body), encoding="utf-8")
+    header = (
+        f"# chunk_id: ch_{ch_id:04d}\n"
+        f"# turns_range: {turns[0].idx}..{turns[-1].idx}\n"
+        f"# turns_count: {len(turns)}\n"
+        "\n"
+    )
+    body = "\n".join(
+        f"[{t.timestamp}] {t.speaker}:\n{t.content if t.content else '(empty)'}\n"
+        for t in turns
+    )
+
+    filename.write_bytes((header + body).encode("utf-8"))
     return filename
 
 
 def load_schema() -> Dict[str, Any]:
     if not SCHEMA_PATH.exists():
         raise FileNotFoundError(f"Missing schema file: {SCHEMA_PATH}")
-    return yaml.safe_load(SCHEMA_PATH.read_text(encoding="utf-8"))
+
+    # Re-runs skip the YAML parse entirely via a pickle cache that is
+    # invalidated whenever schema.yaml is newer.
+    try:
+        if SCHEMA_CACHE_PATH.stat().st_mtime >= SCHEMA_PATH.stat().st_mtime:
+            with SCHEMA_CACHE_PATH.open("rb") as f:
+                cached = pickle.load(f)
+            if isinstance(cached, dict):
+                return cached
+    except Exception:
+        pass  # any unreadable cache is a miss; re-parse below
+
+    schema = yaml.load(SCHEMA_PATH.read_text(encoding="utf-8"), Loader=SafeLoader)
+    try:
+        with SCHEMA_CACHE_PATH.open("wb") as f:
+            pickle.dump(schema, f)
+    except OSError:
+        pass
+    return schema
 
 
 def _date_ymd_slash(timestamp: str) -> str:
@@ -133,20 +196,33 @@ def _time_hms(timestamp: str) -> str:
     return parts[1].strip() if len(parts) == 2 else ""
 
 
+def _deriv_first_date(first_turn: Turn, last_turn: Turn) -> str:
+    return _date_ymd_slash(first_turn.timestamp)
+
+
+def _deriv_time_range(first_turn: Turn, last_turn: Turn) -> str:
+    t1 = _time_hms(first_turn.timestamp)
+    t2 = _time_hms(last_turn.timestamp)
+    return t1 if (not t2 or t1 == t2) else f"{t1}-{t2}"
+
+
+# Derived-function registry: one dict lookup replaces the chain of
+# string compares on every derived field.
+_DERIVED_FNS = {
+    "from_first_turn_date_ymd_slash": _deriv_first_date,
+    "from_first_last_turn_time_range": _deriv_time_range,
+}
+
+
 def derived_value(name: str, first_turn: Turn, last_turn: Turn, derived: Dict[str, str]) -> Optional[str]:
     fn = derived.get(name)
     if not fn:
         return None
 
-    if fn == "from_first_turn_date_ymd_slash":
-        return _date_ymd_slash(first_turn.timestamp)
-
-    if fn == "from_first_last_turn_time_range":
-        t1 = _time_hms(first_turn.timestamp)
-        t2 = _time_hms(last_turn.timestamp)
-        return t1 if (not t2 or t1 == t2) else f"{t1}-{t2}"
-
-    raise ValueError(f"Unknown derived function: {fn}")
+    impl = _DERIVED_FNS.get(fn)
+    if impl is None:
+        raise ValueError(f"Unknown derived function: {fn}")
+    return impl(first_turn, last_turn)
 
 
 def default_value_for_field(field: Dict[str, Any]) -> Any:
@@ -161,26 +237,87 @@ def default_value_for_field(field: Dict[str, Any]) -> Any:
     return None
 
 
-def make_skeleton(schema: Dict[str, Any], first_turn: Turn, last_turn: Turn) -> Dict[str, Any]:
-    out: Dict[str, Any] = {}
+def build_static_skeleton(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Default values for every schema field, computed once per run.
+
+    Per-chunk skeletons copy this template and patch in the derived
+    values, instead of re-walking schema["fields"] for each chunk.
+    """
+    return {f["name"]: default_value_for_field(f) for f in schema.get("fields", [])}
+
+
+def make_skeleton(
+    schema: Dict[str, Any],
+    first_turn: Turn,
+    last_turn: Turn,
+    static: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    if static is None:
+        static = build_static_skeleton(schema)
     derived = schema.get("derived", {}) or {}
 
-    for field in schema.get("fields", []):
-        name = field["name"]
-        dv = derived_value(name, first_turn, last_turn, derived)
-        if dv is not None:
-            out[name] = dv
-        else:
-            out[name] = default_value_for_field(field)
+    out = {k: (v.copy() if isinstance(v, (list, dict)) else v) for k, v in static.items()}
+    for name in derived:
+        if name in out:
+            dv = derived_value(name, first_turn, last_turn, derived)
+            if dv is not None:
+                out[name] = dv
     return out
 
 
-def write_memory_yaml(ch_id: int, schema: Dict[str, Any], first_turn: Turn, last_turn: Turn, out_dir: Path) -> Path:
+_DERIVED_SENTINEL = "@@derived:{}@@"
+
+
+def build_skeleton_template(schema: Dict[str, Any]) -> str:
+    """Serialize the skeleton YAML once, with sentinels for derived fields.
+
+    Per-chunk writes then substitute the two derived values into this
+    string instead of invoking the YAML dumper for every chunk.
+    """
+    derived = schema.get("derived", {}) or {}
+    canonical = build_static_skeleton(schema)
+    for name in derived:
+        if name in canonical:
+            canonical[name] = _DERIVED_SENTINEL.format(name)
+    return yaml.dump(canonical, Dumper=SafeDumper, allow_unicode=True, sort_keys=False)
+
+
+def render_skeleton(template: str, schema: Dict[str, Any], first_turn: Turn, last_turn: Turn) -> str:
+    derived = schema.get("derived", {}) or {}
+    for name in derived:
+        dv = derived_value(name, first_turn, last_turn, derived)
+        template = template.replace(_DERIVED_SENTINEL.format(name), dv or "")
+    return template
+
+
+def write_memory_yaml(
+    ch_id: int,
+    schema: Dict[str, Any],
+    first_turn: Turn,
+    last_turn: Turn,
+    out_dir: Path,
+    static: Optional[Dict[str, Any]] = None,
+    existing: Optional[set] = None,
+    template: Optional[str] = None,
+) -> Path:
     out_dir.mkdir(parents=True, exist_ok=True)
-    path = out_dir / f"ch_{ch_id:04d}.yaml"
-    if not path.exists():
-        data = make_skeleton(schema, first_turn, last_turn)
-        path.write_text(yaml.safe_dump(data, allow_unicode=True, sort_keys=False), encoding="utf-8")
+    name = f"ch_{ch_id:04d}.yaml"
+    path = out_dir / name
+    # `existing` is the result of a single up-front directory scan;
+    # checking it replaces one stat() call per chunk on re-runs.
+    already_there = name in existing if existing is not None else path.exists()
+    if not already_there:
+        if FAST_YAML and orjson is not None:
+            data = make_skeleton(schema, first_turn, last_turn, static)
+            path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            return path
+        if template is not None:
+            content = render_skeleton(template, schema, first_turn, last_turn)
+        else:
+            data = make_skeleton(schema, first_turn, last_turn, static)
+            content = yaml.dump(data, Dumper=SafeDumper, allow_unicode=True, sort_keys=False)
+        # Encode once and write bytes; skips the TextIOWrapper setup of write_text.
+        path.write_bytes(content.encode("utf-8"))
     return path
 
 
@@ -191,20 +328,36 @@ def main():
     schema = load_schema()
 
     text = INPUT_PATH.read_text(encoding="utf-8", errors="ignore")
-    turns = parse_turns(text)
+    turns = parse_turns_text(text)
+    if not turns:
+        turns = list(parse_turns_stream(io.StringIO(text)))
     if not turns:
         raise ValueError("No turns parsed. Check input format or MSG_START_RE.")
 
     ranges = chunk_indices(len(turns), TURNS_PER_CHUNK, OVERLAP_TURNS)
+    static_skeleton = build_static_skeleton(schema)
+    skeleton_template = build_skeleton_template(schema)
 
     CHUNKS_DIR.mkdir(parents=True, exist_ok=True)
     OUT_CHAPTERS_DIR.mkdir(parents=True, exist_ok=True)
 
+    with os.scandir(OUT_CHAPTERS_DIR) as it:
+        existing_yaml = {e.name for e in it if e.is_file()}
+
     for r in ranges:
         ch_id = r["ch_id"]
         chunk_turns = turns[r["start_i"] : r["end_i"]]
         write_chunk_file(chunk_turns, ch_id, CHUNKS_DIR)
-        write_memory_yaml(ch_id, schema, chunk_turns[0], chunk_turns[-1], OUT_CHAPTERS_DIR)
+        write_memory_yaml(
+            ch_id,
+            schema,
+            chunk_turns[0],
+            chunk_turns[-1],
+            OUT_CHAPTERS_DIR,
+            static_skeleton,
+            existing_yaml,
+            skeleton_template,
+        )
 
     print(f"Parsed turns: {len(turns)}")
     print(f"Chunks written: {len(ranges)} -> {CHUNKS_DIR.resolve()}")
@@ -0,0 +1,27 @@
+import io
+
+from split import parse_turns_stream, parse_turns_text
+
+SAMPLE = (
+    "[2025-01-01 10:00:00] Alice: hi\n"
+    "continued line\n"
+    "[2025-01-01 10:00:05] status update without a speaker colon\n"
+    "more content\n"
+    "[2025-01-01 10:01:00] Bob: bye\n"
+)
+
+
+def test_fast_path_matches_stream_parser():
+    # The regex sweep must agree with the line-based state machine,
+    # including on content lines that start with a bare timestamp.
+    fast = parse_turns_text(SAMPLE)
+    slow = list(parse_turns_stream(io.StringIO(SAMPLE)))
+    assert len(fast) == len(slow)
+    assert fast == slow
+
+
+def test_timestamp_content_line_is_kept_as_content():
+    turns = parse_turns_text(SAMPLE)
+    assert len(turns) == 2
+    assert "[2025-01-01 10:00:05]" in turns[0].content
+    assert "more content" in turns[0].content
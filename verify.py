@@ -1,25 +1,90 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+import fnmatch
+import io
+import os
+import pickle
 import re
 import sys
 from typing import Any, Dict, List, Tuple
 
 import yaml
 
+try:  # libyaml C bindings; several times faster than the pure-Python classes
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# FAST_YAML=1 tries orjson first on each file (split.py emits JSON,
+# a YAML subset, under the same flag) and falls back to the YAML loader.
+FAST_YAML = os.environ.get("FAST_YAML") == "1"
+
 CHUNKS_DIR = Path("chunks")
 OUT_CHAPTERS_DIR = Path("output/chapters")
 SCHEMA_PATH = Path("schema.yaml")
+SCHEMA_CACHE_PATH = Path(".schema.pkl")
+
+# Validation strategy bands, by file count:
+#   < LOAD_ALL_MIN_FILES            threads overlap file IO and C-loader parsing
+#   [LOAD_ALL_MIN_FILES, POOL)      one load_all pass amortizes loader startup,
+#                                   which dominates for moderate counts of tiny files
+#   >= PROCESS_POOL_MIN_FILES       per-file fan-out across cores beats the
+#                                   single-threaded concatenated parse
+LOAD_ALL_MIN_FILES = 64
+PROCESS_POOL_MIN_FILES = 256
 
 
 def load_schema() -> Dict[str, Any]:
     if not SCHEMA_PATH.exists():
         raise FileNotFoundError(f"Missing schema file: {SCHEMA_PATH}")
-    return yaml.safe_load(SCHEMA_PATH.read_text(encoding="utf-8"))
+    # Re-runs skip the YAML parse entirely via a pickle cache (shared
+    # with split.py) that is invalidated whenever schema.yaml is newer.
+    schema = None
+    try:
+        if SCHEMA_CACHE_PATH.stat().st_mtime >= SCHEMA_PATH.stat().st_mtime:
+            with SCHEMA_CACHE_PATH.open("rb") as f:
+                schema = pickle.load(f)
+    except Exception:
+        schema = None  # any unreadable cache is a miss; re-parse below
+    if not isinstance(schema, dict):
+        schema = None
+
+    if schema is None:
+        schema = yaml.load(SCHEMA_PATH.read_text(encoding="utf-8"), Loader=SafeLoader)
+        try:
+            with SCHEMA_CACHE_PATH.open("wb") as f:
+                pickle.dump(schema, f)
+        except OSError:
+            pass
+
+    # Compile each field's pattern once so per-file validation skips
+    # re-compiling (re's internal cache is small and shared).
+    for field in schema.get("fields", []):
+        pattern = field.get("pattern")
+        if pattern and "_compiled_pattern" not in field:
+            field["_compiled_pattern"] = re.compile(pattern)
+    return schema
 
 
 def list_sorted(dir_path: Path, pattern: str) -> List[Path]:
-    return sorted(dir_path.glob(pattern))
+    # os.scandir avoids the per-entry stat + Path wrapping of Path.glob;
+    # name-only matching is enough for the flat ch_*.txt / ch_*.yaml layouts.
+    with os.scandir(dir_path) as it:
+        names = [e.name for e in it if e.is_file() and fnmatch.fnmatchcase(e.name, pattern)]
+    names.sort()
+    return [dir_path / n for n in names]
+
+
+def _is_non_empty_str(v: Any) -> bool:
+    return isinstance(v, str) and bool(v.strip())
 
 
 def validate_field(value: Any, field: Dict[str, Any]) -> List[str]:
@@ -44,8 +109,10 @@ def validate_field(value: Any, field: Dict[str, Any]) -> List[str]:
             if isinstance(max_chars, int) and len(v) > max_chars:
                 errors.append(f"{name} exceeds max_chars={max_chars} (len={len(v)})")
             pattern = field.get("pattern")
-            if pattern and not re.match(pattern, v):
-                errors.append(f"{name} does not match pattern: {pattern}")
+            if pattern:
+                compiled = field.get("_compiled_pattern") or re.compile(pattern)
+                if not compiled.match(v):
+                    errors.append(f"{name} does not match pattern: {pattern}")
 
     elif ftype == "list":
         if not isinstance(value, list):
@@ -60,7 +127,7 @@ def validate_field(value: Any, field: Dict[str, Any]) -> List[str]:
 
             min_non_empty_items = field.get("min_non_empty_items")
             if isinstance(min_non_empty_items, int):
-                non_empty = sum(1 for x in value if isinstance(x, str) and x.strip())
+                non_empty = sum(map(_is_non_empty_str, value))
                 if non_empty < min_non_empty_items:
                     errors.append(f"{name} requires >= {min_non_empty_items} non-empty items")
 
@@ -73,14 +140,8 @@ def validate_field(value: Any, field: Dict[str, Any]) -> List[str]:
                 if k not in value and str(k) not in value:
                     errors.append(f"{name} missing key: {k}")
 
-            if field.get("non_empty_any"):
-                any_non_empty = False
-                for v in value.values():
-                    if isinstance(v, str) and v.strip():
-                        any_non_empty = True
-                        break
-                if not any_non_empty:
-                    errors.append(f"{name} has no non-empty values")
+            if field.get("non_empty_any") and not any(map(_is_non_empty_str, value.values())):
+                errors.append(f"{name} has no non-empty values")
 
     else:
         errors.append(f"{name} has unsupported type: {ftype}")
@@ -88,25 +149,28 @@ def validate_field(value: Any, field: Dict[str, Any]) -> List[str]:
     return errors
 
 
-def validate_yaml_against_schema(path: Path, schema: Dict[str, Any]) -> List[str]:
-    errors: List[str] = []
+def prepare_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Hoist per-file schema metadata out of the validation loop."""
+    fields = schema.get("fields", [])
+    return {
+        "fields": fields,
+        "names": frozenset(f.get("name") for f in fields),
+    }
 
-    try:
-        data = yaml.safe_load(path.read_text(encoding="utf-8"))
-    except Exception as e:
-        return [f"YAML parse error: {e}"]
 
+def validate_data(data: Any, prepared: Dict[str, Any]) -> List[str]:
     if not isinstance(data, dict):
         return ["Root is not a mapping/object"]
 
-    fields = schema.get("fields", [])
-    field_names = [f.get("name") for f in fields]
+    errors: List[str] = []
 
-    extra_keys = [k for k in data.keys() if k not in field_names]
+    # key=str keeps the sort total when hand-edited YAML mixes key types
+    # (e.g. an accidental unquoted numeric key next to string keys).
+    extra_keys = sorted(data.keys() - prepared["names"], key=str)
     if extra_keys:
         errors.append(f"Extra keys not in schema.yaml: {extra_keys}")
 
-    for f in fields:
+    for f in prepared["fields"]:
         name = f.get("name")
         value = data.get(name)
         errors.extend(validate_field(value, f))
@@ -114,6 +178,33 @@ def validate_yaml_against_schema(path: Path, schema: Dict[str, Any]) -> List[str
     return errors
 
 
+def validate_yaml_against_schema(path: Path, prepared: Dict[str, Any]) -> List[str]:
+    if FAST_YAML and orjson is not None:
+        try:
+            return validate_data(orjson.loads(path.read_bytes()), prepared)
+        except Exception:
+            pass  # not JSON; parse as YAML below
+    try:
+        data = yaml.load(path.read_text(encoding="utf-8"), Loader=SafeLoader)
+    except Exception as e:
+        return [f"YAML parse error: {e}"]
+    return validate_data(data, prepared)
+
+
+def validate_concatenated(yamls: List[Path], prepared: Dict[str, Any]) -> List[List[str]]:
+    """Parse every YAML file in one load_all pass to amortize loader startup.
+
+    Raises if the concatenated stream does not split back into one
+    document per file (e.g. a file contains its own '---' markers);
+    callers should fall back to per-file parsing.
+    """
+    buf = "\n---\n".join(p.read_text(encoding="utf-8") for p in yamls)
+    docs = list(yaml.load_all(io.StringIO(buf), Loader=SafeLoader))
+    if len(docs) != len(yamls):
+        raise ValueError(f"Expected {len(yamls)} documents, parsed {len(docs)}")
+    return [validate_data(doc, prepared) for doc in docs]
+
+
 def main() -> int:
     if not CHUNKS_DIR.exists():
         print(f"Missing directory: {CHUNKS_DIR.as_posix()}", file=sys.stderr)
@@ -126,6 +217,7 @@ def main() -> int:
         return 2
 
     schema = load_schema()
+    prepared = prepare_schema(schema)
 
     chunks = list_sorted(CHUNKS_DIR, "ch_*.txt")
     yamls = list_sorted(OUT_CHAPTERS_DIR, "ch_*.yaml")
@@ -149,11 +241,24 @@ def main() -> int:
         for x in extra_yaml:
             print(f"  - {x}.yaml")
 
-    bad: List[Tuple[Path, List[str]]] = []
-    for y in yamls:
-        errs = validate_yaml_against_schema(y, schema)
-        if errs:
-            bad.append((y, errs))
+    results = None
+    if (
+        LOAD_ALL_MIN_FILES <= len(yamls) < PROCESS_POOL_MIN_FILES
+        and not (FAST_YAML and orjson is not None)
+    ):
+        try:
+            results = validate_concatenated(yamls, prepared)
+        except Exception:
+            results = None  # per-file parsing below reports the real error
+
+    if results is None:
+        # Each file is read, parsed, and validated independently — fan out.
+        validate = partial(validate_yaml_against_schema, prepared=prepared)
+        pool_cls = ProcessPoolExecutor if len(yamls) >= PROCESS_POOL_MIN_FILES else ThreadPoolExecutor
+        with pool_cls() as ex:
+            results = list(ex.map(validate, yamls, chunksize=16))
+
+    bad: List[Tuple[Path, List[str]]] = [(y, errs) for y, errs in zip(yamls, results) if errs]
 
     if bad:
         print("\nInvalid / incomplete YAML files:")